@@ -23,71 +23,202 @@ License: CC-BY SA 4.0
 """
 
 import argparse
+import os
+import re
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+from pyarrow import feather
 import folium
 import geopandas as gpd
-from shapely.geometry import Point
 import matplotlib.colors as mcolors
 
+# Columns with few distinct values, stored as pandas categoricals after reading
+CATEGORICAL_COLUMNS = ("countryCode", "owner", "instrClass", "satSys", "lookDir", "refFrame", "siteId")
+
+# Column types declared when parsing the sheet. Columns that mix numbers, dates and free text
+# are read as text, which keeps them in a single type (and storable in the Feather cache).
+INSAR_DTYPES = {
+    "latitude": "float64",
+    "longitude": "float64",
+    "insarStart": str,
+    "insarEnd": str,
+    "gnssEnd": str,
+    "crdEntry": str,
+}
+
+# 'insarEnd' value marking targets that are still active, and the column caching that check
+ACTIVE_INSAR_END = np.int32(99999999)
+ACTIVE_COLUMN = "_active"
+
+# Schema tag stored in the Feather cache metadata; a cache with another tag is re-read from Excel.
+# Bump the version whenever the cached columns or their types change.
+CACHE_SCHEMA_KEY = b"insar_mapper_schema"
+CACHE_SCHEMA_VERSION = b"1"
+
+# Owner color palettes, Tableau colors first and CSS4 colors once those run out
+TABLEAU_COLOR_VALUES = tuple(mcolors.TABLEAU_COLORS.values())
+CSS4_COLOR_VALUES = tuple(mcolors.CSS4_COLORS.values())
+
+# Size in pixels of the square SVG box each map marker is drawn in
+MARKER_SIZE = 20
+
 # -------------------------------------------------------------------
 # Helper: Filter logging
 # -------------------------------------------------------------------
-def log_filter_stats(df_before, df_after, filter_name):
-    """Helper function to print filter statistics (rows kept, removed, and percentage)."""
-    before, after = len(df_before), len(df_after)
+def log_filter_stats(before, after, filter_name):
+    """Helper function to print filter statistics (rows kept, removed, and percentage) from row counts."""
     removed = before - after
     pct = (after / before * 100) if before > 0 else 0
     print(f"    ↳ {filter_name}: kept {after}/{before} rows ({pct:.1f}%), removed {removed}.\n")
 
+def isin_values(series, values):
+    """Returns a boolean mask of 'series' values in 'values', using a plain equality check for a single value."""
+    if len(values) == 1:
+        return series == values[0]
+    return series.isin(values)
+
+def string_mask(series, match):
+    """
+    Returns the boolean mask of 'match' (a function from a string Series to a boolean Series) applied to 'series'.
+    Categoricals are matched once per category and mapped to the rows through the category codes,
+    with missing values (code -1) giving False. Other columns are matched on their string values.
+    """
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        hits = match(pd.Series(series.cat.categories.astype(str))).to_numpy(dtype=bool)
+        # The appended False is what code -1 indexes
+        hits = np.append(hits, False)
+        return pd.Series(hits[series.cat.codes.to_numpy()], index=series.index)
+    return match(series.astype(str))
+
+def contains_any(series, substrings):
+    """Returns a boolean mask of the string values in 'series' that contain any of the given substrings."""
+    if not substrings:
+        return pd.Series(False, index=series.index)
+    pattern = "|".join(map(re.escape, substrings))
+    return string_mask(series, lambda values: values.str.contains(pattern, regex=True, na=False))
+
 # -------------------------------------------------------------------
 # Data Reading and Filters
 # -------------------------------------------------------------------
-def read_insar_db(filepath, columns=None):
+def read_insar_db(filepath, columns=None, use_cache=True):
     """
     Reads the 'insarTargets' sheet from the given Excel file into a DataFrame.
 
+    The sheet is parsed with the calamine engine when available (falling back to openpyxl).
+    The typed DataFrame is then stored as a Feather (Arrow IPC) file next to the Excel file,
+    which later runs memory-map instead of parsing the Excel file again. The cache is used as
+    long as it is newer than the Excel file and carries the current schema version.
+
     Args:
         filepath (str): Path to the Excel file.
         columns (list, optional): List of columns to keep. If None, all columns are kept.
+        use_cache (bool, optional): Read from and write to the '<filepath>.feather' cache.
 
     Returns:
-        pd.DataFrame: Cleaned DataFrame with optional column selection.
+        pd.DataFrame: Cleaned DataFrame with optional column selection. When 'insarEnd' is loaded,
+        a boolean '_active' column with the precomputed active-target check is added.
     """
 
-    print(f"--> Reading InSAR database from '{filepath}'...")
-    df = pd.read_excel(filepath, sheet_name='insarTargets')
-    df.columns = df.iloc[0]
-    df.drop(df.index[0], inplace=True)
+    # The precomputed active check travels along with 'insarEnd'
+    keep = None
+    if columns:
+        keep = list(columns) + ([ACTIVE_COLUMN] if "insarEnd" in columns else [])
+
+    df = None
+    cache_path = filepath + ".feather"
+    if use_cache and os.path.exists(cache_path) and os.path.getmtime(cache_path) >= os.path.getmtime(filepath):
+        print(f"--> Reading cached InSAR database from '{cache_path}'...")
+        try:
+            # Only the file footer is read here, the columns are memory-mapped below
+            with pa.memory_map(cache_path) as source:
+                schema = pa.ipc.open_file(source).schema
+        except (OSError, ValueError) as e:
+            schema = None
+            print(f"    ↳ Cache could not be read, falling back to Excel: {e}")
+
+        if schema is not None and (schema.metadata or {}).get(CACHE_SCHEMA_KEY) != CACHE_SCHEMA_VERSION:
+            print("    ↳ Cache was written with another schema version, falling back to Excel.")
+        elif schema is not None:
+            # The cache holds the whole sheet, so a column missing here is missing from the Excel file too
+            missing = [col for col in keep or [] if col not in schema.names]
+            if missing:
+                raise KeyError(f"Columns not found in the InSAR database: {missing}")
+            df = feather.read_table(cache_path, columns=keep, memory_map=True).to_pandas()
+
+    if df is None:
+        print(f"--> Reading InSAR database from '{filepath}'...")
+        # The first sheet row is a banner, the second holds the column names
+        try:
+            df = pd.read_excel(filepath, sheet_name='insarTargets', header=1, dtype=INSAR_DTYPES, engine='calamine')
+        except ImportError:
+            df = pd.read_excel(filepath, sheet_name='insarTargets', header=1, dtype=INSAR_DTYPES, engine='openpyxl')
+
+        # Parse 'insarEnd' as int32 so the active check is a plain integer comparison.
+        # Non-numeric entries (such as timestamps of finished campaigns) become 0, i.e. inactive.
+        if "insarEnd" in df.columns:
+            df["insarEnd"] = pd.to_numeric(df["insarEnd"], errors="coerce").fillna(0).astype(np.int32)
+            df[ACTIVE_COLUMN] = df["insarEnd"].to_numpy() == ACTIVE_INSAR_END
+
+        # Store low-cardinality text columns as categoricals, so filters compare integer codes
+        for col in CATEGORICAL_COLUMNS:
+            if col in df.columns:
+                df[col] = df[col].astype("category")
+
+        if use_cache:
+            try:
+                table = pa.Table.from_pandas(df, preserve_index=False)
+                metadata = {**(table.schema.metadata or {}), CACHE_SCHEMA_KEY: CACHE_SCHEMA_VERSION}
+                feather.write_feather(table.replace_schema_metadata(metadata), cache_path)
+                print(f"    ↳ Feather cache saved: {cache_path}")
+            except (OSError, TypeError, ValueError) as e:
+                print(f"    ↳ Feather cache not saved: {e}")
+
+        if keep:
+            df = df.loc[:, keep]
 
     if columns:
-        df = df.loc[:, columns]
         print(f"--> Selected {len(columns)} columns.")
 
     print(f"--> Data loaded: {len(df)} records, {len(df.columns)} columns.\n")
     return df
 
+def valid_mask(df):
+    """Returns the boolean mask of rows where 'valid' == True."""
+    return (df["valid"] == True).to_numpy()
+
 def filter_valid(df):
     """Filters DataFrame to include only rows where 'valid' == True."""
     print("--> Filtering valid entries...")
-    df_before = df.copy()
-    filtered_df = df[df["valid"] == True]
-    log_filter_stats(df_before, filtered_df, "Valid filter")
+    before = len(df)
+    filtered_df = df[valid_mask(df)]
+    log_filter_stats(before, len(filtered_df), "Valid filter")
     return filtered_df
 
+def country_mask(df, countries):
+    """Returns the boolean mask of rows with a 'countryCode' in the given list."""
+    return isin_values(df["countryCode"], countries).to_numpy()
+
 def filter_country(df, countries):
     """Filters DataFrame to include only rows with a 'countryCode' in the given list."""
     print(f"--> Filtering for countries: {countries}...")
-    df_before = df.copy()
-    filtered_df = df[df["countryCode"].isin(countries)]
-    log_filter_stats(df_before, filtered_df, "Country filter")
+    before = len(df)
+    filtered_df = df[country_mask(df, countries)]
+    log_filter_stats(before, len(filtered_df), "Country filter")
     return filtered_df
 
+def active_mask(df):
+    """Returns the boolean active-target mask, using the precomputed '_active' column when present."""
+    if ACTIVE_COLUMN in df.columns:
+        return df[ACTIVE_COLUMN].to_numpy()
+    return df["insarEnd"].to_numpy() == ACTIVE_INSAR_END
+
 def filter_active(df):
     """Filters DataFrame to include only rows with active targets"""
     print("--> Filtering active InSAR targets...")
-    df_before = df.copy()
-    filtered_df = df[df["insarEnd"] == 99999999]
-    log_filter_stats(df_before, filtered_df, "Active targets filter")
+    before = len(df)
+    filtered_df = df[active_mask(df)]
+    log_filter_stats(before, len(filtered_df), "Active targets filter")
     return filtered_df
 
 def filter_satSys(df, satSystems=['S1A', 'RS2']):
@@ -95,55 +226,63 @@ def filter_satSys(df, satSystems=['S1A', 'RS2']):
     Filters DataFrame to include rows whose 'satSys' contains 'All' or matches any given satellite system.
     """
     print(f"--> Filtering for satellite systems: {satSystems}...")
-    df_before = df.copy()
-    df = df.copy()
-    df['satSys'] = df['satSys'].astype(str)
-    mask = (
-        df['satSys'].str.contains('All', case=False, na=False) |
-        df['satSys'].apply(lambda x: any(sat in x for sat in satSystems))
-    )
+    before = len(df)
+    # One regex pass: 'All' matches case-insensitively, the satellite names case-sensitively
+    pattern = "|".join(["(?i:All)"] + [re.escape(sat) for sat in satSystems])
+    mask = string_mask(df['satSys'], lambda values: values.str.contains(pattern, regex=True, na=False))
     filtered_df = df[mask]
-    log_filter_stats(df_before, filtered_df, "Satellite system filter")
+    log_filter_stats(before, len(filtered_df), "Satellite system filter")
     return filtered_df
 
+def normalize_instrClass(instr_class, types):
+    """
+    Maps each instrument class to the first of the given types it contains (unmatched values are kept).
+    The lookup is done once per distinct class rather than once per row.
+    """
+    categories = instr_class.astype("category")
+    mapping = {cat: next((t for t in types if t in str(cat)), cat) for cat in categories.cat.categories}
+    return categories.map(mapping)
+
+def instr_class_mask(df, types, strict):
+    """Returns the boolean mask of rows whose 'instrClass' equals (strict) or contains (non-strict) any of the given types."""
+    if strict:
+        return string_mask(df["instrClass"], lambda values: values.isin(types)).to_numpy()
+    return contains_any(df["instrClass"], types).to_numpy()
+
 def filter_instrClass(df, types=["CR"], strict=True):
     """Filters DataFrame by 'instrClass' field. If strict=True, matches exact values; otherwise allows substring matches."""
     print(f"--> Filtering by instrument class: {types} (strict={strict})...")
-    df_before = df.copy()
-    df = df.copy()
-    df["instrClass"] = df["instrClass"].astype(str)
+    before = len(df)
+    mask = instr_class_mask(df, types, strict)
 
     if strict:
-        filtered_df = df[df["instrClass"].isin(types)]
+        filtered_df = df[mask]
     else:
-        mask = df["instrClass"].apply(lambda x: any(instr in x for instr in types))
         filtered_df = df[mask].copy()
 
-        # Normalize mixed instrument classes
-        def normalize(instr):
-            for t in types:
-                if t in instr:
-                    return t
-            return instr
-        filtered_df["instrClass"] = filtered_df["instrClass"].apply(normalize)
+        filtered_df["instrClass"] = normalize_instrClass(filtered_df["instrClass"], types)
 
-    log_filter_stats(df_before, filtered_df, "Instrument class filter")
+    log_filter_stats(before, len(filtered_df), "Instrument class filter")
     return filtered_df
 
+def owner_mask(df, owners):
+    """Returns the boolean mask of rows where 'owner' is in the given list."""
+    return isin_values(df['owner'], owners).to_numpy()
+
 def filter_owner(df, owners=['TUD']):
     """Filters DataFrame to include only rows where 'owner' is in the given list."""
     print(f"--> Filtering for owners: {owners}...")
-    df_before = df.copy()
-    filtered_df = df[df['owner'].isin(owners)]
-    log_filter_stats(df_before, filtered_df, "Owner filter")
+    before = len(df)
+    filtered_df = df[owner_mask(df, owners)]
+    log_filter_stats(before, len(filtered_df), "Owner filter")
     return filtered_df
 
 def filter_siteId(df, sites=['HENGELO']):
     """Filters DataFrame to include only rows where 'siteId' is in the given list."""
     print(f"--> Filtering for site IDs: {sites}...")
-    df_before = df.copy()
-    filtered_df = df[df['siteId'].isin(sites)]
-    log_filter_stats(df_before, filtered_df, "Site ID filter")
+    before = len(df)
+    filtered_df = df[isin_values(df['siteId'], sites)]
+    log_filter_stats(before, len(filtered_df), "Site ID filter")
     return filtered_df
 
 def filter_lookDir(df, directions=['E']):
@@ -152,16 +291,111 @@ def filter_lookDir(df, directions=['E']):
     Allows substring matches for flexibility.
     """
     print(f"--> Filtering for look directions: {directions}...")
-    df_before = df.copy()
-    df = df.copy()
-    df['lookDir'] = df['lookDir'].astype(str)
-    mask = df['lookDir'].apply(lambda x: any(direction in x for direction in directions))
+    before = len(df)
+    mask = contains_any(df['lookDir'], directions)
     filtered_df = df[mask]
-    log_filter_stats(df_before, filtered_df, "Look direction filter")
+    log_filter_stats(before, len(filtered_df), "Look direction filter")
     return filtered_df
+
+# -------------------------------------------------------------------
+# Combined Filtering
+# -------------------------------------------------------------------
+def build_mask(df, args):
+    """
+    Combines the filters requested on the command line into a single boolean row mask,
+    so the DataFrame only has to be sliced once. Statistics are logged per filter, in the
+    same order and format as the individual filter functions.
+
+    Args:
+        df (pd.DataFrame): DataFrame as returned by read_insar_db.
+        args (argparse.Namespace): Parsed command-line arguments.
+
+    Returns:
+        np.ndarray: Boolean mask with one entry per row of df.
+    """
+    mask = np.ones(len(df), dtype=bool)
+    kept = len(df)
+
+    # AND each mask in place; a step's kept count is the next step's starting count
+    def apply(step_mask, filter_name):
+        nonlocal kept
+        before = kept
+        np.logical_and(mask, step_mask, out=mask)
+        kept = int(np.count_nonzero(mask))
+        log_filter_stats(before, kept, filter_name)
+
+    # Apply filters only if the argument is not None or empty
+    if args.countries:
+        print(f"--> Filtering for countries: {args.countries}...")
+        apply(country_mask(df, args.countries), "Country filter")
+    if args.valid:
+        print("--> Filtering valid entries...")
+        apply(valid_mask(df), "Valid filter")
+    if args.active:
+        print("--> Filtering active InSAR targets...")
+        apply(active_mask(df), "Active targets filter")
+    if args.instrClass:
+        print(f"--> Filtering by instrument class: {args.instrClass} (strict={args.strict})...")
+        apply(instr_class_mask(df, args.instrClass, args.strict), "Instrument class filter")
+    if args.owners:
+        print(f"--> Filtering for owners: {args.owners}...")
+        apply(owner_mask(df, args.owners), "Owner filter")
+
+    return mask
 # -------------------------------------------------------------------
 # Mapping Function
 # -------------------------------------------------------------------
+def polygon_svg_path(n_vertices, radii, start_angle=-90):
+    """
+    Returns an SVG path for a polygon centred in the marker box. Vertex distances cycle through
+    'radii' (a single radius gives a regular polygon, two alternating radii give a star).
+    """
+    angles = np.deg2rad(start_angle + np.arange(n_vertices) * 360 / n_vertices)
+    r = np.resize(np.asarray(radii, dtype=float), n_vertices)
+    xs = MARKER_SIZE / 2 + r * np.cos(angles)
+    ys = MARKER_SIZE / 2 + r * np.sin(angles)
+    return "M" + "L".join(f"{x:.2f} {y:.2f}" for x, y in zip(xs, ys)) + "Z"
+
+# SVG outline per marker shape (circles are drawn with a <circle> element)
+MARKER_PATHS = {
+    "triangle": polygon_svg_path(3, [7]),
+    "square": polygon_svg_path(4, [7], start_angle=-135),
+    "star": polygon_svg_path(10, [7, 3.5]),
+    "diamond": polygon_svg_path(4, [7]),
+}
+
+def marker_svg(shape, color):
+    """Returns the inline SVG used as icon for a map marker of the given shape and color."""
+    paint = f'fill="{color}" fill-opacity="0.9" stroke="{color}" stroke-width="3" stroke-linejoin="round"'
+    if shape in MARKER_PATHS:
+        outline = f'<path d="{MARKER_PATHS[shape]}" {paint}/>'
+    else:
+        outline = f'<circle cx="{MARKER_SIZE / 2}" cy="{MARKER_SIZE / 2}" r="5" {paint}/>'
+    return f'<svg xmlns="http://www.w3.org/2000/svg" width="{MARKER_SIZE}" height="{MARKER_SIZE}">{outline}</svg>'
+
+def sorted_unique(series):
+    """Returns the sorted distinct non-null values of a Series, taken from the used categories for categoricals."""
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return sorted(series.cat.remove_unused_categories().cat.categories)
+    return sorted(series.dropna().unique())
+
+def build_popup_html(df, popup_cols):
+    """
+    Builds the popup HTML ('<b>col:</b> value' lines joined by '<br>') for every row at once,
+    using one string concatenation per column instead of formatting row by row.
+
+    Args:
+        df (pd.DataFrame): Points to build popups for.
+        popup_cols (list): Columns to display; columns missing from df are skipped.
+
+    Returns:
+        pd.Series: Popup HTML per row, aligned with df.
+    """
+    parts = [f"<b>{col}:</b> " + df[col].astype(str) for col in popup_cols if col in df.columns]
+    if not parts:
+        return pd.Series("", index=df.index)
+    return parts[0].str.cat(parts[1:], sep="<br>")
+
 def plot_insar_points_interactive(
     df,
     lat_col="latitude",
@@ -207,48 +441,59 @@ def plot_insar_points_interactive(
     print(f"--> Creating interactive map for {len(df)} InSAR points...")
 
     # Create color map for owners
-    owners = sorted(df[owner_col].dropna().unique())
-    colors = list(mcolors.TABLEAU_COLORS.values())
+    owners = sorted_unique(df[owner_col])
+    colors = TABLEAU_COLOR_VALUES
     while len(colors) < len(owners):
-        colors += list(mcolors.CSS4_COLORS.values())
+        colors += CSS4_COLOR_VALUES
     owner_color_map = {owner: colors[i] for i, owner in enumerate(owners)}
 
     # Marker shapes for instrument class
     icon_shapes = ["circle", "triangle", "square", "star", "diamond"]
-    instr_classes = sorted(df[instr_col].dropna().unique())
+    instr_classes = sorted_unique(df[instr_col])
     instr_icon_map = {instr: icon_shapes[i % len(icon_shapes)] for i, instr in enumerate(instr_classes)}
 
+    # Per-point coordinates, read once as float arrays
+    lats = df[lat_col].to_numpy(dtype=float)
+    lons = df[lon_col].to_numpy(dtype=float)
+
     # Compute center of map
-    center_lat = df[lat_col].astype(float).mean()
-    center_lon = df[lon_col].astype(float).mean()
+    center_lat = np.nanmean(lats)
+    center_lon = np.nanmean(lons)
     m = folium.Map(location=[center_lat, center_lon], zoom_start=zoom_start, tiles=background)
 
-    # Add points to map
-    for _, row in df.iterrows():
-        lat, lon = float(row[lat_col]), float(row[lon_col])
-        owner = row.get(owner_col, "Unknown")
-        instr = row.get(instr_col, "Unknown")
-
-        # Build popup info
-        popup_text = "<br>".join([f"<b>{col}:</b> {row[col]}" for col in popup_cols if col in df.columns])
-
-        # Get color and shape
-        color = owner_color_map.get(owner, "gray")
-        shape = instr_icon_map.get(instr, "circle")
-
-        # Map folium marker types
-        if shape == "circle":
-            marker = folium.CircleMarker(location=[lat, lon], radius=5, color=color, fill=True,
-                                         fill_color=color, fill_opacity=0.9,
-                                         popup=folium.Popup(popup_text, max_width=250))
-        else:
-            marker = folium.RegularPolygonMarker(
-                location=[lat, lon],
-                number_of_sides={"triangle": 3, "square": 4, "star": 5, "diamond": 4}.get(shape, 4),
-                radius=7, color=color, fill=True, fill_color=color,
-                fill_opacity=0.9, popup=folium.Popup(popup_text, max_width=250)
-            )
-        marker.add_to(m)
+    # Per-point attributes, computed column-wise instead of row by row
+    point_colors = df[owner_col].map(owner_color_map).astype(object).fillna("gray").tolist()
+    point_shapes = df[instr_col].map(instr_icon_map).astype(object).fillna("circle").tolist()
+
+    # Build popup info
+    popups = build_popup_html(df, popup_cols).tolist()
+
+    # Assemble all points as GeoJSON features in one pass
+    features = [
+        {
+            "type": "Feature",
+            "id": i,
+            "geometry": {"type": "Point", "coordinates": [lon, lat]},
+            "properties": {"color": color, "shape": shape, "popup": popup},
+        }
+        for i, (lat, lon, color, shape, popup) in enumerate(zip(lats, lons, point_colors, point_shapes, popups))
+    ]
+
+    # Add all points as a single GeoJSON layer. Every marker is a DivIcon whose SVG is chosen
+    # by the style function; one SVG string is generated per (shape, color) combination.
+    icon_svgs = {key: marker_svg(*key) for key in set(zip(point_shapes, point_colors))}
+    folium.GeoJson(
+        {"type": "FeatureCollection", "features": features},
+        marker=folium.Marker(icon=folium.DivIcon(
+            icon_size=(MARKER_SIZE, MARKER_SIZE),
+            icon_anchor=(MARKER_SIZE // 2, MARKER_SIZE // 2),
+            class_name="insar-marker"
+        )),
+        style_function=lambda f: {"html": icon_svgs[(f["properties"]["shape"], f["properties"]["color"])]},
+        on_each_feature=folium.JsCode(
+            "function(feature, layer) { layer.bindPopup(feature.properties.popup, {maxWidth: 250}); }"
+        )
+    ).add_to(m)
 
     # Add title
     m.get_root().html.add_child(folium.Element(
@@ -267,26 +512,25 @@ def plot_insar_points_interactive(
                     padding: 10px;'> 
                     <b>Legend</b><br>"""
 
-    legend_html += "<u>Owners</u><br>"
-    for owner, color in owner_color_map.items(): legend_html += (f"<i style='background:{color};" 
-                                                                 f"width:10px;" 
-                                                                 f"height:10px;" 
-                                                                 f"float:left;" 
-                                                                 f"margin-right:6px;" 
-                                                                 f"border:1px solid grey'>" 
-                                                                 f"</i>{owner}<br>")
-    legend_html += "<br><u>Instrument Class</u><br>"
-    for instr, shape in instr_icon_map.items(): legend_html += f"&#9679; {instr} ({shape})<br>"
-    legend_html += "</div>"
+    owner_entries = "".join(
+        f"<i style='background:{color};width:10px;height:10px;float:left;margin-right:6px;border:1px solid grey'>"
+        f"</i>{owner}<br>"
+        for owner, color in owner_color_map.items()
+    )
+    instr_entries = "".join(f"&#9679; {instr} ({shape})<br>" for instr, shape in instr_icon_map.items())
+    legend_html = "".join([
+        legend_html,
+        "<u>Owners</u><br>", owner_entries,
+        "<br><u>Instrument Class</u><br>", instr_entries,
+        "</div>",
+    ])
 
     m.get_root().html.add_child(folium.Element(legend_html))
 
-    # Export to GeoJSON
-    gdf = gpd.GeoDataFrame(df.copy(),
-        geometry=[Point(xy) for xy in zip(df[lon_col].astype(float), df[lat_col].astype(float))],
-        crs="EPSG:4326"
-    )
-    gdf.to_file(save_geojson_path, driver="GeoJSON")
+    # Export to GeoJSON, without the internal '_active' helper column
+    geometry = gpd.points_from_xy(lons, lats, crs="EPSG:4326")
+    gdf = gpd.GeoDataFrame(df.drop(columns=ACTIVE_COLUMN, errors="ignore"), geometry=geometry, copy=False)
+    gdf.to_file(save_geojson_path, driver="GeoJSON", engine="pyogrio")
     print(f"    ↳ GeoJSON saved: {save_geojson_path}")
 
     # Save HTML
@@ -330,20 +574,13 @@ def main():
     # Read database
     df = read_insar_db(args.file, columns)
 
-    # Apply filters only if the argument is not None or empty
-    if args.countries:
-        df = filter_country(df, args.countries)
-    if args.valid:
-        df = filter_valid(df)
-    if args.active:
-        df = filter_active(df)
-    if args.instrClass:
-        df = filter_instrClass(df, types=args.instrClass, strict=args.strict)
-    if args.owners:
-        df = df[df["owner"].isin(args.owners)]
+    # Apply all filters with a single slice
+    df = df.loc[build_mask(df, args)].copy()
+    if args.instrClass and not args.strict:
+        df["instrClass"] = normalize_instrClass(df["instrClass"], args.instrClass)
 
     if args.save_csv:
-        df.to_csv(args.save_csv, index=False)
+        df.drop(columns=ACTIVE_COLUMN, errors="ignore").to_csv(args.save_csv, index=False)
 
     # Plot map
     plot_insar_points_interactive(